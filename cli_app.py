@@ -4,13 +4,18 @@ Command-line interface for the Documentation Chatbot.
 """
 
 import argparse
+import asyncio
 import sys
 import os
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 
-from chatbot import DocumentationChatbot
 from config import Config
 
+# chatbot pulls in LangChain, the OpenAI SDK and the vector stores, so it is
+# only imported once the arguments are parsed (keeps --help instant)
+if TYPE_CHECKING:
+    from chatbot import DocumentationChatbot
+
 def print_banner():
     """Print the application banner."""
     print("=" * 60)
@@ -33,14 +38,26 @@ def print_response(response: Dict[str, Any]):
             print(f"  Content: {source['content'][:100]}...")
     print()
 
-def interactive_mode(chatbot: DocumentationChatbot):
+def interactive_mode(chatbot: "DocumentationChatbot"):
     """Run the chatbot in interactive mode."""
+    asyncio.run(ainteractive_mode(chatbot))
+
+async def ainteractive_mode(chatbot: "DocumentationChatbot"):
+    """Interactive loop running on an event loop, so answers use the async LLM client."""
     print("🔄 Interactive mode started. Type 'quit' or 'exit' to stop.")
     print("💡 Type 'help' for available commands.")
     print()
     
+    try:
+        await _interactive_loop(chatbot)
+    finally:
+        await chatbot.aclose()
+
+async def _interactive_loop(chatbot: "DocumentationChatbot"):
+    """Read questions until the user quits."""
     while True:
         try:
+            # Blocking here is fine: nothing else runs on the loop while waiting for input
             user_input = input("❓ You: ").strip()
             
             if user_input.lower() in ['quit', 'exit', 'q']:
@@ -69,14 +86,14 @@ def interactive_mode(chatbot: DocumentationChatbot):
                 continue
             
             # Get response from chatbot
-            response = chatbot.ask_question(user_input)
+            response = await chatbot.aask_question(user_input)
             
             if response["status"] == "error":
                 print(f"\n❌ Error: {response['message']}")
             else:
                 print_response(response)
         
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             print("\n\n👋 Goodbye!")
             break
         except Exception as e:
@@ -93,22 +110,38 @@ def print_help():
     print("  Or just type your question!")
     print()
 
-def load_documents_command(chatbot: DocumentationChatbot, directory: str):
-    """Load documents from a directory."""
-    print(f"📁 Loading documents from: {directory}")
-    result = chatbot.load_documents(directory)
+def load_documents_command(chatbot: "DocumentationChatbot", paths: List[str]):
+    """Load documents from directories and/or individual files."""
+    files = [path for path in paths if os.path.isfile(path)]
+    directories = [path for path in paths if not os.path.isfile(path)]
     
-    if result["status"] == "success":
-        print(f"✅ {result['message']}")
-        if "stats" in result:
-            stats = result["stats"]
-            print(f"   📊 Total chunks: {stats['total_chunks']}")
-            print(f"   📊 Unique files: {stats['unique_files']}")
-            print(f"   📊 File types: {stats['file_types']}")
-    else:
-        print(f"⚠️ {result['message']}")
+    for directory in directories:
+        print(f"📁 Loading documents from: {directory}")
+        result = chatbot.load_documents(directory)
+        
+        if result["status"] == "success":
+            print(f"✅ {result['message']}")
+            if "stats" in result:
+                stats = result["stats"]
+                print(f"   📊 Total chunks: {stats['total_chunks']}")
+                print(f"   📊 Unique files: {stats['unique_files']}")
+                print(f"   📊 File types: {stats['file_types']}")
+        else:
+            print(f"⚠️ {result['message']}")
+    
+    if files:
+        # Embed and store all individual files in a single batch
+        print(f"📄 Adding {len(files)} files")
+        result = chatbot.add_documents(files)
+        
+        if result["status"] == "success":
+            print(f"✅ {result['message']}")
+        else:
+            print(f"⚠️ {result['message']}")
+        for file_path in result.get("failed", []):
+            print(f"   ❌ Failed to process: {file_path}")
 
-def ask_question_command(chatbot: DocumentationChatbot, question: str):
+def ask_question_command(chatbot: "DocumentationChatbot", question: str):
     """Ask a single question and exit."""
     response = chatbot.ask_question(question)
     
@@ -118,8 +151,20 @@ def ask_question_command(chatbot: DocumentationChatbot, question: str):
     else:
         print_response(response)
 
-def main():
-    """Main CLI application."""
+def parse_single_question(argv: List[str]) -> Optional[str]:
+    """Return the question for a bare `-q "..."` invocation, otherwise None.
+    
+    One-shot questions are the most common invocation, so they skip building
+    the full argument parser.
+    """
+    if len(argv) == 2 and argv[0] in ("-q", "--question") and not argv[1].startswith("-"):
+        return argv[1]
+    if len(argv) == 1 and argv[0].startswith("--question="):
+        return argv[0][len("--question="):]
+    return None
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the CLI argument parser."""
     parser = argparse.ArgumentParser(
         description="Team Documentation Q&A Chatbot",
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -129,8 +174,9 @@ def main():
     parser.add_argument(
         "--load-docs", 
         type=str, 
-        metavar="DIRECTORY",
-        help="Load documents from a directory"
+        nargs="+",
+        metavar="PATH",
+        help="Load documents from one or more directories or files"
     )
     
     parser.add_argument(
@@ -160,7 +206,17 @@ def main():
         help="Enable verbose logging"
     )
     
-    args = parser.parse_args()
+    return parser
+
+def main():
+    """Main CLI application."""
+    question = parse_single_question(sys.argv[1:])
+    if question is not None:
+        args = argparse.Namespace(
+            load_docs=None, question=question, interactive=False, db_type=None, verbose=False
+        )
+    else:
+        args = build_parser().parse_args()
     
     # Print banner
     print_banner()
@@ -168,6 +224,7 @@ def main():
     try:
         # Initialize chatbot
         print("🔧 Initializing chatbot...")
+        from chatbot import DocumentationChatbot
         chatbot = DocumentationChatbot(db_type=args.db_type)
         print("✅ Chatbot initialized successfully!")
         
@@ -11,18 +11,37 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     
+    # Embedding Configuration
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")  # "openai", "infinity", "jina" or "local"
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")  # Defaults to the backend's default model
+    EMBEDDING_URL = os.getenv("EMBEDDING_URL", "http://localhost:7997")
+    JINA_API_KEY = os.getenv("JINA_API_KEY")
+    
     # Vector Database Configuration
-    VECTOR_DB_TYPE = os.getenv("VECTOR_DB_TYPE", "chroma")  # Only "chroma" supported
+    VECTOR_DB_TYPE = os.getenv("VECTOR_DB_TYPE", "chroma")  # "chroma" or "faiss" (requires faiss-cpu)
     CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+    FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "./faiss_index")
+    FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "hnsw")  # "hnsw", "hnsw_sq" or "ivfpq"
+    INDEX_PRESET = os.getenv("INDEX_PRESET", "balanced")  # Chroma HNSW preset: "fast", "balanced" or "accurate"
     
     # Document Processing Configuration
     DOCS_DIRECTORY = os.getenv("DOCS_DIRECTORY", "./documents")
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "512"))
     
     # Retrieval Configuration
     RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "4"))
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
+    INT8_INDEX_ENABLED = os.getenv("INT8_INDEX_ENABLED", "false").lower() == "true"
+    
+    # Semantic Cache Configuration
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+    SEMANTIC_CACHE_DIRECTORY = os.getenv("SEMANTIC_CACHE_DIRECTORY", "./semantic_cache")
+    REDIS_URL = os.getenv("REDIS_URL")  # Share the cache through Redis when set
+    SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "300"))  # Seconds, Redis cache only
     
     # Chat Configuration
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "1000"))
@@ -34,6 +53,9 @@ class Config:
         if not cls.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
+        if cls.EMBEDDING_BACKEND.lower() == "jina" and not cls.JINA_API_KEY:
+            raise ValueError("JINA_API_KEY environment variable is required for the jina embedding backend")
+        
         # Create necessary directories
         os.makedirs(cls.DOCS_DIRECTORY, exist_ok=True)
         os.makedirs(cls.CHROMA_PERSIST_DIRECTORY, exist_ok=True)
@@ -1,43 +1,311 @@
+import io
 import os
+import json
+import codecs
+import mmap
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any
+import tempfile
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Tuple
 from pathlib import Path
 
+import tiktoken
 from langchain.document_loaders import (
     PyPDFLoader,
     Docx2txtLoader,
-    TextLoader,
     DirectoryLoader
 )
+from langchain.document_loaders.base import BaseLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
 from config import Config
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pypdfium2 is optional; PDFs fall back to PyPDFLoader
+    pdfium = None
+
+try:
+    import docx2txt
+except ImportError:  # docx2txt is optional; uploaded .docx files go through a temp file
+    docx2txt = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tokenizer used by OpenAI's chat and embedding models
+TOKEN_ENCODING = "cl100k_base"
+
+# Load the encoding at import so the first split in each process doesn't pay for it
+tiktoken.get_encoding(TOKEN_ENCODING)
+
+# PDFium is not thread-safe, so every call into it within a process is serialized
+_PDFIUM_LOCK = threading.Lock()
+
+class PdfiumLoader(BaseLoader):
+    """Load a PDF as a single Document using PDFium's native text extraction.
+    
+    When data is given, the PDF is parsed from those bytes and file_path is
+    only used as the source name. Parsing holds _PDFIUM_LOCK, so PDFs loaded
+    from several threads are extracted one at a time; the process pool in
+    aload_documents is what parallelizes them.
+    """
+    
+    def __init__(self, file_path: str, data: bytes = None):
+        self.file_path = file_path
+        self.data = data
+    
+    def load(self) -> List[Document]:
+        if self.data is not None:
+            with _PDFIUM_LOCK:
+                return [self._extract(pdfium.PdfDocument(self.data))]
+        
+        with open(self.file_path, "rb") as f:
+            # Pages are read front to back, so ask the kernel for aggressive readahead
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            
+            with _PDFIUM_LOCK:
+                return [self._extract(pdfium.PdfDocument(f))]
+    
+    def _extract(self, pdf) -> Document:
+        text = io.StringIO()
+        try:
+            total_pages = len(pdf)
+            for index in range(total_pages):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                text.write(textpage.get_text_range())
+                text.write("\n\n")
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+        
+        return Document(
+            page_content=text.getvalue(),
+            metadata={"source": self.file_path, "total_pages": total_pages}
+        )
+
+class StreamingTextLoader(BaseLoader):
+    """Load a text file as a sequence of bounded windows instead of one string.
+    
+    The file is read into a reused bytearray, decoded incrementally and
+    emitted as Documents of at most window_chars characters, cut at a
+    paragraph, line or word boundary, so peak memory no longer grows with
+    the file size. Consecutive windows share about CHUNK_OVERLAP tokens of
+    text, like the chunks split from them.
+    """
+    
+    SEPARATORS = ("\n\n", "\n", " ")
+    
+    def __init__(self, file_path: str, encoding: str = "utf-8"):
+        self.file_path = file_path
+        self.encoding = encoding
+        # CHUNK_SIZE is in tokens; a token is roughly four bytes of English text
+        self.read_size = Config.CHUNK_SIZE * 4
+        self.window_chars = self.read_size * 4
+        self.overlap_chars = Config.CHUNK_OVERLAP * 4
+    
+    def lazy_load(self) -> Iterator[Document]:
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        buffer = bytearray(self.read_size)
+        view = memoryview(buffer)
+        pending = ""
+        
+        with open(self.file_path, "rb") as f:
+            while True:
+                size = f.readinto(buffer)
+                pending += decoder.decode(view[:size], final=size == 0)
+                
+                while len(pending) >= self.window_chars:
+                    cut = self._cut(pending)
+                    if pending[:cut].strip():
+                        yield self._document(pending[:cut])
+                    pending = pending[self._overlap_start(pending, cut):]
+                
+                if size == 0:
+                    break
+        
+        if pending.strip():
+            yield self._document(pending)
+    
+    def load(self) -> List[Document]:
+        return list(self.lazy_load())
+    
+    def _cut(self, text: str) -> int:
+        """Find where to end the next window, preferring natural boundaries."""
+        # Only break in the back half, so an early paragraph break doesn't
+        # produce a tiny window
+        earliest = self.window_chars // 2
+        for separator in self.SEPARATORS:
+            index = text.rfind(separator, earliest, self.window_chars)
+            if index >= earliest:
+                return index + len(separator)
+        return self.window_chars
+    
+    def _overlap_start(self, text: str, cut: int) -> int:
+        """Find where the next window starts so it repeats the tail of this one."""
+        start = cut - self.overlap_chars
+        if start <= 0:
+            return cut
+        
+        # Begin the overlap on a word boundary
+        index = text.find(" ", start, cut)
+        return index + 1 if index >= 0 else start
+    
+    def _document(self, text: str) -> Document:
+        return Document(page_content=text, metadata={"source": self.file_path})
+
+class DocumentManifest:
+    """Record of ingested files, used to skip files that haven't changed.
+    
+    Maps each absolute file path to its mtime, SHA-256 digest and the ids of
+    the chunks stored for it. Changes are staged by record/touch/prune and
+    only applied by commit, once the vector database write has succeeded.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._removed = set()
+        
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not read document manifest {path}: {e}")
+    
+    @staticmethod
+    def _digest(file_path: str) -> str:
+        """Compute the SHA-256 of a file without reading it into memory."""
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return hashlib.sha256().hexdigest()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+    
+    def fingerprint(self, file_path: str) -> Tuple[int, str]:
+        """Return (mtime_ns, sha256) for a file, only hashing it when its mtime changed."""
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        entry = self.entries.get(file_path)
+        if entry is not None and entry["mtime_ns"] == mtime_ns:
+            return mtime_ns, entry["sha256"]
+        return mtime_ns, self._digest(file_path)
+    
+    def is_unchanged(self, file_path: str, digest: str) -> bool:
+        """Check whether a file's content matches what was last ingested."""
+        entry = self.entries.get(file_path)
+        return entry is not None and entry["sha256"] == digest
+    
+    def touch(self, file_path: str, mtime_ns: int) -> None:
+        """Stage a new mtime for a file whose content is unchanged."""
+        self._pending[file_path] = dict(self.entries[file_path], mtime_ns=mtime_ns)
+    
+    def record(self, file_path: str, mtime_ns: int, digest: str, documents: List[Document]) -> None:
+        """Stage a (re)ingested file, assigning stable ids to its chunks."""
+        prefix = hashlib.sha256(f"{file_path}:{digest}".encode("utf-8")).hexdigest()[:16]
+        chunk_ids = []
+        for i, doc in enumerate(documents):
+            doc.metadata["chunk_id"] = f"{prefix}-{i}"
+            chunk_ids.append(doc.metadata["chunk_id"])
+        
+        self._pending[file_path] = {"mtime_ns": mtime_ns, "sha256": digest, "chunk_ids": chunk_ids}
+    
+    def prune(self, directory: str, seen: set) -> None:
+        """Stage removal of files under directory that no longer exist."""
+        prefix = os.path.join(os.path.abspath(directory), "")
+        for file_path in self.entries:
+            if file_path.startswith(prefix) and file_path not in seen:
+                self._removed.add(file_path)
+    
+    def remove(self, file_path: str) -> None:
+        """Stage removal of a single file."""
+        if file_path in self.entries:
+            self._removed.add(file_path)
+    
+    def stale_chunk_ids(self) -> List[str]:
+        """Ids of stored chunks made obsolete by the staged changes."""
+        stale = []
+        for file_path in self._removed:
+            stale.extend(self.entries[file_path]["chunk_ids"])
+        for file_path, entry in self._pending.items():
+            if file_path in self.entries:
+                current = set(entry["chunk_ids"])
+                stale.extend(i for i in self.entries[file_path]["chunk_ids"] if i not in current)
+        return stale
+    
+    def commit(self) -> None:
+        """Apply staged changes and write the manifest to disk."""
+        self.entries.update(self._pending)
+        for file_path in self._removed:
+            self.entries.pop(file_path, None)
+        self.rollback()
+        
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+    
+    def rollback(self) -> None:
+        """Discard staged changes."""
+        self._pending = {}
+        self._removed = set()
+
 class DocumentProcessor:
     """Process and chunk documents for vector storage."""
     
+    # Upper bound on files being parsed at the same time
+    MAX_CONCURRENT_LOADERS = 16
+    
+    # Below this many files a process pool costs more to start than it saves
+    MIN_FILES_FOR_PROCESS_POOL = 4
+    
+    # Token-aware splitter shared by all instances in a process
+    _text_splitter = None
+    
     def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP,
-            length_function=len,
-        )
+        self.text_splitter = self._get_text_splitter()
         
         # Supported file extensions and their loaders
         self.file_loaders = {
-            '.pdf': PyPDFLoader,
+            '.pdf': PdfiumLoader if pdfium is not None else PyPDFLoader,
             '.docx': Docx2txtLoader,
             '.doc': Docx2txtLoader,
-            '.txt': TextLoader,
-            '.md': TextLoader,
+            '.txt': StreamingTextLoader,
+            '.md': StreamingTextLoader,
         }
     
-    def load_documents(self, directory: str = None) -> List[Document]:
+    @classmethod
+    def _get_text_splitter(cls) -> RecursiveCharacterTextSplitter:
+        """Return the shared splitter, which measures chunk sizes in tokens."""
+        if cls._text_splitter is None:
+            cls._text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+                encoding_name=TOKEN_ENCODING,
+                chunk_size=Config.CHUNK_SIZE,
+                chunk_overlap=Config.CHUNK_OVERLAP,
+            )
+        return cls._text_splitter
+    
+    def load_documents(self, directory: str = None, manifest: DocumentManifest = None) -> List[Document]:
         """Load all supported documents from a directory."""
+        return asyncio.run(self.aload_documents(directory, manifest))
+    
+    async def aload_documents(self, directory: str = None, manifest: DocumentManifest = None) -> List[Document]:
+        """Load all supported documents from a directory, parsing files concurrently.
+        
+        When a manifest is given, files whose content is unchanged since they were
+        last recorded are skipped and the changes are staged in the manifest.
+        """
         if directory is None:
             directory = Config.DOCS_DIRECTORY
             
@@ -47,18 +315,82 @@ class DocumentProcessor:
             logger.warning(f"Documents directory {directory} does not exist")
             return documents
         
-        for file_path in Path(directory).rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in self.file_loaders:
+        file_paths = list(self._iter_supported_files(directory))
+        
+        # Parsing (PDF text extraction in particular) is CPU-bound, so spread
+        # larger batches across processes instead of threads sharing the GIL
+        executor = None
+        worker = self.load_single_document
+        if len(file_paths) >= self.MIN_FILES_FOR_PROCESS_POOL:
+            # Spawn rather than fork: forking a multi-threaded process can hand
+            # the workers locks (e.g. _PDFIUM_LOCK) held by other threads
+            executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            worker = _load_and_split_worker
+        
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_LOADERS)
+        
+        if manifest is not None:
+            manifest.rollback()
+        
+        async def load(file_path: str) -> List[Document]:
+            async with semaphore:
                 try:
-                    docs = self.load_single_document(str(file_path))
-                    documents.extend(docs)
+                    if manifest is not None:
+                        key = os.path.abspath(file_path)
+                        mtime_ns, digest = await loop.run_in_executor(None, manifest.fingerprint, key)
+                        if manifest.is_unchanged(key, digest):
+                            manifest.touch(key, mtime_ns)
+                            return []
+                    
+                    docs = await loop.run_in_executor(executor, worker, file_path)
+                    if manifest is not None and docs:
+                        manifest.record(key, mtime_ns, digest, docs)
                     logger.info(f"Loaded {len(docs)} chunks from {file_path}")
+                    return docs
                 except Exception as e:
                     logger.error(f"Error loading {file_path}: {e}")
+                    return []
+        
+        try:
+            for docs in await asyncio.gather(*(load(file_path) for file_path in file_paths)):
+                documents.extend(docs)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        if manifest is not None:
+            manifest.prune(directory, {os.path.abspath(file_path) for file_path in file_paths})
         
         logger.info(f"Total documents loaded: {len(documents)}")
         return documents
     
+    def _iter_supported_files(self, directory: str):
+        """Recursively yield paths of supported files.
+        
+        Uses os.scandir, whose entries carry the file type from the directory
+        listing, instead of building and stat-ing a Path for every entry.
+        """
+        loaders = self.file_loaders
+        pending = [directory]
+        
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file():
+                            stem, _, extension = entry.name.rpartition('.')
+                            if stem and '.' + extension.lower() in loaders:
+                                yield entry.path
+            except OSError as e:
+                logger.error(f"Error scanning {current}: {e}")
+    
     def load_single_document(self, file_path: str) -> List[Document]:
         """Load and process a single document."""
         file_extension = Path(file_path).suffix.lower()
@@ -70,25 +402,74 @@ class DocumentProcessor:
         
         try:
             loader = loader_class(file_path)
-            raw_documents = loader.load()
+            # Streaming loaders are split window by window as they are read
+            if isinstance(loader, StreamingTextLoader):
+                raw_documents = loader.lazy_load()
+            else:
+                raw_documents = loader.load()
             
-            # Add metadata
-            for doc in raw_documents:
-                doc.metadata.update({
-                    'source_file': file_path,
-                    'file_type': file_extension,
-                    'file_name': Path(file_path).name
-                })
+            return self._split_documents(raw_documents, file_path, file_extension)
             
-            # Split documents into chunks
-            documents = self.text_splitter.split_documents(raw_documents)
+        except Exception as e:
+            logger.error(f"Error processing {file_path}: {e}")
+            return []
+    
+    def load_bytes(self, file_name: str, data: bytes) -> List[Document]:
+        """Load and process a document held in memory, such as an upload.
+        
+        Text, Markdown, .docx and (with pypdfium2) PDF files are parsed
+        straight from the bytes; other formats go through a temporary file.
+        """
+        file_extension = Path(file_name).suffix.lower()
+        
+        if file_extension not in self.file_loaders:
+            raise ValueError(f"Unsupported file type: {file_extension}")
+        
+        try:
+            if file_extension in ('.txt', '.md'):
+                raw_documents = [Document(page_content=data.decode('utf-8'), metadata={"source": file_name})]
+            elif file_extension == '.docx' and docx2txt is not None:
+                # Same extraction as Docx2txtLoader, so tables and headers are kept
+                raw_documents = [Document(
+                    page_content=docx2txt.process(io.BytesIO(data)),
+                    metadata={"source": file_name}
+                )]
+            elif file_extension == '.pdf' and pdfium is not None:
+                raw_documents = PdfiumLoader(file_name, data=data).load()
+            else:
+                # The remaining loaders only accept a path
+                with tempfile.NamedTemporaryFile(suffix=file_extension, delete=False) as tmp_file:
+                    tmp_file.write(data)
+                try:
+                    raw_documents = self.file_loaders[file_extension](tmp_file.name).load()
+                finally:
+                    os.unlink(tmp_file.name)
+                for doc in raw_documents:
+                    doc.metadata["source"] = file_name
             
-            return documents
+            return self._split_documents(raw_documents, file_name, file_extension)
             
         except Exception as e:
-            logger.error(f"Error processing {file_path}: {e}")
+            logger.error(f"Error processing {file_name}: {e}")
             return []
     
+    def _split_documents(self, raw_documents, source_file: str, file_extension: str) -> List[Document]:
+        """Tag loaded documents with their source and split them into chunks."""
+        documents = []
+        file_name = Path(source_file).name
+        for doc in raw_documents:
+            # Add metadata
+            doc.metadata.update({
+                'source_file': source_file,
+                'file_type': file_extension,
+                'file_name': file_name
+            })
+            
+            # Split documents into chunks
+            documents.extend(self.text_splitter.split_documents([doc]))
+        
+        return documents
+    
     def add_document(self, file_path: str) -> List[Document]:
         """Add a single document to the knowledge base."""
         return self.load_single_document(file_path)
@@ -98,25 +479,22 @@ class DocumentProcessor:
         if not documents:
             return {}
         
-        file_types = {}
-        source_files = set()
-        total_chars = 0
-        
-        for doc in documents:
-            # Count file types
-            file_type = doc.metadata.get('file_type', 'unknown')
-            file_types[file_type] = file_types.get(file_type, 0) + 1
-            
-            # Track source files
-            source_files.add(doc.metadata.get('source_file', 'unknown'))
-            
-            # Count characters
-            total_chars += len(doc.page_content)
-        
+        file_types = Counter(doc.metadata.get('file_type', 'unknown') for doc in documents)
+        source_files = {doc.metadata.get('source_file', 'unknown') for doc in documents}
         return {
             'total_chunks': len(documents),
-            'total_characters': total_chars,
-            'file_types': file_types,
+            'total_characters': sum(len(doc.page_content) for doc in documents),
+            'file_types': dict(file_types),
             'unique_files': len(source_files),
             'source_files': list(source_files)
-        }
\ No newline at end of file
+        }
+
+# Per-process DocumentProcessor used by _load_and_split_worker
+_worker_processor = None
+
+def _load_and_split_worker(file_path: str) -> List[Document]:
+    """Load and split a single document inside a process pool worker."""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor()
+    return _worker_processor.load_single_document(file_path)
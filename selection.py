@@ -0,0 +1,70 @@
+import logging
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional; fall back to NumPy selection
+    numba = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _topk_numpy(scores: np.ndarray, k: int) -> np.ndarray:
+    """Select the top-k indices with argpartition, then sort just those."""
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+if numba is not None:
+    @numba.njit(cache=True, fastmath=True)
+    def _topk_numba(scores: np.ndarray, k: int) -> np.ndarray:
+        """Select the top-k indices with a bounded min-heap (partial heapsort)."""
+        heap_scores = np.empty(k, dtype=scores.dtype)
+        heap_indices = np.empty(k, dtype=np.int64)
+        size = 0
+        
+        for i in range(scores.shape[0]):
+            score = scores[i]
+            if size < k:
+                # Sift the new entry up
+                j = size
+                size += 1
+                while j > 0:
+                    parent = (j - 1) // 2
+                    if heap_scores[parent] <= score:
+                        break
+                    heap_scores[j] = heap_scores[parent]
+                    heap_indices[j] = heap_indices[parent]
+                    j = parent
+                heap_scores[j] = score
+                heap_indices[j] = i
+            elif score > heap_scores[0]:
+                # Replace the smallest entry and sift it down
+                j = 0
+                while True:
+                    child = 2 * j + 1
+                    if child >= k:
+                        break
+                    if child + 1 < k and heap_scores[child + 1] < heap_scores[child]:
+                        child += 1
+                    if heap_scores[child] >= score:
+                        break
+                    heap_scores[j] = heap_scores[child]
+                    heap_indices[j] = heap_indices[child]
+                    j = child
+                heap_scores[j] = score
+                heap_indices[j] = i
+        
+        order = np.argsort(-heap_scores[:size])
+        return heap_indices[:size][order]
+
+def topk(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the k highest scores, best first."""
+    scores = np.ascontiguousarray(scores)
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    
+    if numba is not None:
+        return _topk_numba(scores, k)
+    return _topk_numpy(scores, k)
@@ -0,0 +1,312 @@
+import os
+import json
+import atexit
+import pickle
+import hashlib
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+try:
+    import redis
+    from redis.commands.search.field import VectorField, TextField
+    from redis.commands.search.query import Query
+    try:
+        from redis.commands.search.index_definition import IndexDefinition, IndexType
+    except ImportError:  # redis-py < 6
+        from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+except ImportError:  # redis is optional; only needed for RedisSemanticCache
+    redis = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """LRU cache of responses keyed on L2-normalized query embeddings.
+    
+    Rows of ``E`` are ordered from least to most recently used, so eviction
+    always drops row 0 and a hit rolls its row to the end. New entries are
+    written to disk at most every SAVE_INTERVAL seconds and at exit.
+    """
+    
+    EMBEDDINGS_FILE = "embeddings.npy"
+    ENTRIES_FILE = "entries.pkl"
+    
+    # Seconds between writes of a persisted cache that has new entries
+    SAVE_INTERVAL = 30.0
+    
+    def __init__(self, threshold: float, max_entries: int = 1024, persist_directory: str = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.persist_directory = persist_directory
+        
+        self.E: Optional[np.ndarray] = None
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.RLock()
+        
+        # Serializes writes so an older snapshot never overwrites a newer one
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        
+        if persist_directory:
+            self._load()
+            atexit.register(self.flush)
+    
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm > 0 else q
+    
+    def get(self, question: str, embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """Return the cached response for the closest query above the threshold."""
+        q = self._normalize(embedding)
+        
+        with self._lock:
+            if self.E is None or not self.entries or self.E.shape[1] != q.shape[0]:
+                return None
+            
+            scores = self.E @ q
+            i = int(np.argmax(scores))
+            if scores[i] < self.threshold:
+                return None
+            
+            # Mark as most recently used
+            self.E[i:] = np.roll(self.E[i:], -1, axis=0)
+            self.entries.append(self.entries.pop(i))
+            return self.entries[-1]
+    
+    def put(self, question: str, embedding: Sequence[float], response: Dict[str, Any]) -> None:
+        """Cache a response, evicting the least recently used entry when full."""
+        q = self._normalize(embedding)
+        
+        with self._lock:
+            if self.E is None or self.E.shape[1] != q.shape[0]:
+                self.E = np.empty((0, q.shape[0]), dtype=np.float32)
+                self.entries = []
+            
+            if len(self.entries) >= self.max_entries:
+                self.E = np.roll(self.E, -1, axis=0)
+                self.E[-1] = q
+                self.entries.pop(0)
+            else:
+                self.E = np.vstack([self.E, q[None, :]])
+            self.entries.append(response)
+            
+            self._schedule_save()
+    
+    def replace(self, old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+        """Swap a response returned by get for a new one under the same query.
+        
+        Returns False when the old response has since been evicted.
+        """
+        with self._lock:
+            for i in range(len(self.entries) - 1, -1, -1):
+                if self.entries[i] is old:
+                    self.entries[i] = new
+                    self._schedule_save()
+                    return True
+            return False
+    
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self.E = None
+            self.entries = []
+            self._dirty = True
+        
+        # Don't let stale answers come back after a restart
+        self.flush()
+    
+    def flush(self) -> None:
+        """Write pending changes to disk now."""
+        if not self.persist_directory:
+            return
+        
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                E = None if self.E is None else self.E.copy()
+                entries = list(self.entries)
+            
+            # Lookups and inserts carry on while the snapshot is written
+            self._save(E, entries)
+    
+    def _schedule_save(self) -> None:
+        """Mark the cache dirty and make sure a write is pending (lock held)."""
+        if not self.persist_directory:
+            return
+        
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.SAVE_INTERVAL, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def _load(self) -> None:
+        """Load a previously persisted cache, if any."""
+        embeddings_path = os.path.join(self.persist_directory, self.EMBEDDINGS_FILE)
+        entries_path = os.path.join(self.persist_directory, self.ENTRIES_FILE)
+        
+        if not (os.path.exists(embeddings_path) and os.path.exists(entries_path)):
+            return
+        
+        try:
+            E = np.load(embeddings_path)
+            with open(entries_path, "rb") as f:
+                entries = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load semantic cache from {self.persist_directory}: {e}")
+            return
+        
+        if len(entries) != E.shape[0]:
+            logger.warning("Semantic cache files are out of sync - starting with an empty cache")
+            return
+        
+        self.E = E[-self.max_entries:].astype(np.float32, copy=False)
+        self.entries = entries[-self.max_entries:]
+        logger.info(f"Loaded {len(self.entries)} cached responses from {self.persist_directory}")
+    
+    def _save(self, E: Optional[np.ndarray], entries: List[Dict[str, Any]]) -> None:
+        """Persist a snapshot of the cache to disk."""
+        try:
+            os.makedirs(self.persist_directory, exist_ok=True)
+            embeddings_path = os.path.join(self.persist_directory, self.EMBEDDINGS_FILE)
+            entries_path = os.path.join(self.persist_directory, self.ENTRIES_FILE)
+            
+            if E is None:
+                for path in (embeddings_path, entries_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                return
+            
+            np.save(embeddings_path, E)
+            with open(entries_path, "wb") as f:
+                pickle.dump(entries, f)
+        except Exception as e:
+            logger.warning(f"Could not persist semantic cache: {e}")
+
+class RedisSemanticCache:
+    """Semantic cache shared between processes, stored in Redis.
+    
+    Each entry is a hash keyed by the SHA-1 of the question, so identical
+    questions hit without a vector search. Near-duplicates are found with a
+    RediSearch KNN query over a cosine HNSW index of the embeddings.
+    Entries expire after ttl seconds.
+    """
+    
+    INDEX_NAME = "idx:qcache"
+    KEY_PREFIX = "qcache:"
+    
+    def __init__(self, url: str, threshold: float, ttl: int = 300):
+        if redis is None:
+            raise ImportError("redis is not installed. Install redis to use the Redis semantic cache.")
+        
+        self.client = redis.Redis.from_url(url)
+        self.threshold = threshold
+        self.ttl = ttl
+        self._index_ready = False
+    
+    def _key(self, question: str) -> str:
+        return self.KEY_PREFIX + hashlib.sha1(question.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _text(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+    
+    def _decode(self, answer, sources) -> Dict[str, Any]:
+        return {"answer": self._text(answer), "sources": json.loads(self._text(sources))}
+    
+    def _ensure_index(self, dim: int) -> None:
+        """Create the vector index on first use."""
+        if self._index_ready:
+            return
+        
+        try:
+            self.client.ft(self.INDEX_NAME).info()
+        except redis.ResponseError:
+            self.client.ft(self.INDEX_NAME).create_index(
+                [
+                    TextField("answer"),
+                    VectorField("embedding", "HNSW", {
+                        "TYPE": "FLOAT32",
+                        "DIM": dim,
+                        "DISTANCE_METRIC": "COSINE"
+                    })
+                ],
+                definition=IndexDefinition(prefix=[self.KEY_PREFIX], index_type=IndexType.HASH)
+            )
+        self._index_ready = True
+    
+    def get(self, question: str, embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """Return the cached response for this question or a close paraphrase."""
+        try:
+            exact = self.client.hmget(self._key(question), "answer", "sources")
+            if exact[0] is not None:
+                return self._decode(*exact)
+            
+            query = (
+                Query("*=>[KNN 1 @embedding $vec AS score]")
+                .return_fields("answer", "sources", "score")
+                .dialect(2)
+            )
+            vector = np.asarray(embedding, dtype=np.float32).tobytes()
+            result = self.client.ft(self.INDEX_NAME).search(query, query_params={"vec": vector})
+            if not result.docs:
+                return None
+            
+            # RediSearch reports cosine distance
+            doc = result.docs[0]
+            if 1.0 - float(doc.score) < self.threshold:
+                return None
+            return self._decode(doc.answer, doc.sources)
+        
+        except redis.RedisError as e:
+            # The index does not exist until the first put
+            logger.debug(f"Redis semantic cache lookup failed: {e}")
+            return None
+    
+    def put(self, question: str, embedding: Sequence[float], response: Dict[str, Any]) -> None:
+        """Cache a response with the configured TTL."""
+        try:
+            vector = np.asarray(embedding, dtype=np.float32)
+            self._ensure_index(vector.shape[0])
+            
+            key = self._key(question)
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hset(key, mapping={
+                "embedding": vector.tobytes(),
+                "answer": response["answer"],
+                "sources": json.dumps(response["sources"])
+            })
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not write to Redis semantic cache: {e}")
+    
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        try:
+            keys = list(self.client.scan_iter(match=self.KEY_PREFIX + "*", count=500))
+            for start in range(0, len(keys), 500):
+                self.client.delete(*keys[start:start + 500])
+        except redis.RedisError as e:
+            logger.warning(f"Could not clear Redis semantic cache: {e}")
+    
+    def __len__(self) -> int:
+        try:
+            return int(self.client.ft(self.INDEX_NAME).info()["num_docs"])
+        except redis.RedisError:
+            return 0
@@ -35,6 +35,18 @@ def install_dependencies():
         print(f"❌ Error installing dependencies: {e}")
         sys.exit(1)
 
+def precompile_sources():
+    """Byte-compile the project so the first CLI run doesn't pay for it."""
+    print("\n⚡ Precompiling Python sources...")
+    try:
+        subprocess.check_call([
+            sys.executable, "-m", "compileall", "-q", "-j", str(os.cpu_count() or 1), "."
+        ])
+        print("✅ Sources precompiled!")
+    except subprocess.CalledProcessError as e:
+        # Python compiles on first import anyway, so this is not fatal
+        print(f"⚠️  Could not precompile sources: {e}")
+
 def create_directories():
     """Create necessary directories."""
     print("\n📁 Creating directories...")
@@ -136,6 +148,7 @@ def main():
     # Run setup steps
     check_python_version()
     install_dependencies()
+    precompile_sources()
     create_directories()
     setup_environment()
     create_sample_documents()
@@ -1,6 +1,5 @@
 import streamlit as st
-import os
-import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any
 
 from chatbot import DocumentationChatbot
@@ -14,12 +13,26 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Number of most recent messages drawn on each rerun; older ones are behind a toggle
+HISTORY_WINDOW = 20
+
+@st.cache_resource(show_spinner="Loading knowledge base...")
+def _get_chatbot() -> DocumentationChatbot:
+    """Create the chatbot once per server process and share it between sessions."""
+    return DocumentationChatbot()
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def _cached_search(query: str, k: int):
+    """Search results for (query, k), cached until the knowledge base changes."""
+    return _get_chatbot().search_documents(query, k=k)
+
 def initialize_chatbot():
     """Initialize the chatbot with session state."""
     if 'chatbot' not in st.session_state:
         try:
-            st.session_state.chatbot = DocumentationChatbot()
+            st.session_state.chatbot = _get_chatbot()
             st.session_state.chat_history = []
+            st.session_state.show_full_history = False
         except Exception as e:
             st.error(f"Failed to initialize chatbot: {e}")
             st.stop()
@@ -32,15 +45,67 @@ def display_chat_message(message: Dict[str, Any], is_user: bool = False):
     else:
         with st.chat_message("assistant"):
             st.write(message["answer"])
-            
-            # Show sources if available
-            if message.get("sources"):
-                with st.expander(f"📄 Sources ({len(message['sources'])} documents)"):
-                    for i, source in enumerate(message["sources"]):
-                        st.write(f"**Source {i+1}:**")
-                        st.write(f"File: {source['metadata'].get('file_name', 'Unknown')}")
-                        st.write(f"Content: {source['content']}")
-                        st.divider()
+            display_sources(message)
+
+def display_sources(message: Dict[str, Any]):
+    """Show a bot message's sources, if any, in a collapsed expander."""
+    if message.get("sources"):
+        with st.expander(f"📄 Sources ({len(message['sources'])} documents)"):
+            st.markdown(sources_markdown(message))
+
+def sources_markdown(message: Dict[str, Any]) -> str:
+    """Format a message's sources as one Markdown block, built once per message."""
+    if "sources_markdown" not in message:
+        message["sources_markdown"] = "\n\n---\n\n".join(
+            f"**Source {i+1}:**\n\n"
+            f"File: {source['metadata'].get('file_name', 'Unknown')}\n\n"
+            f"Content: {source['content']}"
+            for i, source in enumerate(message["sources"])
+        )
+    return message["sources_markdown"]
+
+@st.fragment
+def chat_panel():
+    """Chat history and input, rerun on their own when a question is asked."""
+    st.header("💬 Chat with Your Documentation")
+    
+    # Display chat history, limited to the most recent messages unless expanded
+    history = st.session_state.chat_history
+    hidden = 0 if st.session_state.show_full_history else max(0, len(history) - HISTORY_WINDOW)
+    if hidden and st.button(f"Show {hidden} earlier messages"):
+        st.session_state.show_full_history = True
+        st.rerun(scope="fragment")
+    
+    chat_container = st.container()
+    with chat_container:
+        for message in history[hidden:]:
+            if message["type"] == "user":
+                display_chat_message(message, is_user=True)
+            else:
+                display_chat_message(message, is_user=False)
+    
+    # Chat input
+    user_question = st.chat_input("Ask a question about your documentation...")
+    
+    if user_question:
+        # Add user message to history
+        user_message = {"type": "user", "content": user_question}
+        st.session_state.chat_history.append(user_message)
+        
+        # Display user message
+        with chat_container:
+            display_chat_message(user_message, is_user=True)
+        
+        # Stream the bot response into place as it is generated
+        tokens, response = st.session_state.chatbot.ask_question_stream(user_question)
+        with chat_container:
+            with st.chat_message("assistant"):
+                st.write_stream(tokens)
+                display_sources(response)
+        
+        # Add bot response to history; it is already displayed, so no extra rerun is needed
+        bot_message = {"type": "bot", **response}
+        st.session_state.chat_history.append(bot_message)
 
 def main():
     st.title("📚 Team Documentation Q&A Chatbot")
@@ -74,28 +139,33 @@ def main():
         if uploaded_files:
             if st.button("Process Uploaded Files"):
                 with st.spinner("Processing uploaded files..."):
+                    # Parse and embed all uploads in parallel, straight from memory
                     success_count = 0
-                    for uploaded_file in uploaded_files:
-                        # Save uploaded file temporarily
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                            tmp_file.write(uploaded_file.read())
-                            tmp_file_path = tmp_file.name
+                    with ThreadPoolExecutor(max_workers=min(8, len(uploaded_files))) as executor:
+                        futures = {
+                            executor.submit(
+                                st.session_state.chatbot.add_document_bytes,
+                                uploaded_file.name,
+                                uploaded_file.getvalue()
+                            ): uploaded_file.name
+                            for uploaded_file in uploaded_files
+                        }
                         
-                        try:
-                            # Add document to chatbot
-                            result = st.session_state.chatbot.add_document(tmp_file_path)
-                            if result["status"] == "success":
-                                success_count += 1
-                                st.success(f"✅ {uploaded_file.name}: {result['message']}")
-                            else:
-                                st.error(f"❌ {uploaded_file.name}: {result['message']}")
-                        except Exception as e:
-                            st.error(f"❌ {uploaded_file.name}: {str(e)}")
-                        finally:
-                            # Clean up temporary file
-                            os.unlink(tmp_file_path)
+                        # Report each file as soon as it finishes
+                        for future in as_completed(futures):
+                            file_name = futures[future]
+                            try:
+                                result = future.result()
+                                if result["status"] == "success":
+                                    success_count += 1
+                                    st.success(f"✅ {file_name}: {result['message']}")
+                                else:
+                                    st.error(f"❌ {file_name}: {result['message']}")
+                            except Exception as e:
+                                st.error(f"❌ {file_name}: {str(e)}")
                     
                     if success_count > 0:
+                        _cached_search.clear()
                         st.success(f"Successfully processed {success_count} files!")
                         st.rerun()
         
@@ -109,6 +179,7 @@ def main():
             with st.spinner("Loading documents..."):
                 result = st.session_state.chatbot.load_documents(docs_dir)
                 if result["status"] == "success":
+                    _cached_search.clear()
                     st.success(result["message"])
                     if "stats" in result:
                         st.json(result["stats"])
@@ -120,49 +191,14 @@ def main():
         # Settings
         st.subheader("🔧 Settings")
         if st.button("Clear Chat History"):
+            # Only this session's history; the chatbot and its memory are shared by every session
             st.session_state.chat_history = []
-            st.session_state.chatbot.reset_conversation()
+            st.session_state.show_full_history = False
             st.success("Chat history cleared!")
             st.rerun()
     
     # Main chat interface
-    st.header("💬 Chat with Your Documentation")
-    
-    # Display chat history
-    chat_container = st.container()
-    with chat_container:
-        for message in st.session_state.chat_history:
-            if message["type"] == "user":
-                display_chat_message(message, is_user=True)
-            else:
-                display_chat_message(message, is_user=False)
-    
-    # Chat input
-    user_question = st.chat_input("Ask a question about your documentation...")
-    
-    if user_question:
-        # Add user message to history
-        user_message = {"type": "user", "content": user_question}
-        st.session_state.chat_history.append(user_message)
-        
-        # Display user message
-        with chat_container:
-            display_chat_message(user_message, is_user=True)
-        
-        # Get bot response
-        with st.spinner("Thinking..."):
-            response = st.session_state.chatbot.ask_question(user_question)
-        
-        # Add bot response to history
-        bot_message = {"type": "bot", **response}
-        st.session_state.chat_history.append(bot_message)
-        
-        # Display bot response
-        with chat_container:
-            display_chat_message(bot_message, is_user=False)
-        
-        # Rerun to update the display
-        st.rerun()
+    chat_panel()
     
     # Additional features
     st.divider()
@@ -175,7 +211,7 @@ def main():
         
         if st.button("Search") and search_query:
             with st.spinner("Searching..."):
-                results = st.session_state.chatbot.search_documents(search_query, k=search_k)
+                results = _cached_search(search_query, search_k)
             
             if results:
                 st.write(f"Found {len(results)} relevant documents:")
@@ -183,7 +219,7 @@ def main():
                     with st.expander(f"Result {i+1} (Score: {result['similarity_score']:.3f})"):
                         st.write(f"**File:** {result['metadata'].get('file_name', 'Unknown')}")
                         st.write(f"**Content:** {result['content']}")
-                        st.json(result['metadata'])
+                        st.caption(" · ".join(f"{key}={value}" for key, value in result['metadata'].items()))
             else:
                 st.info("No results found.")
 
@@ -1,29 +1,97 @@
 import os
+import json
+import uuid
 import pickle
+import asyncio
+import hashlib
 import logging
-from typing import List, Optional, Tuple
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional, Tuple
 from abc import ABC, abstractmethod
 
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 
 from langchain.vectorstores import Chroma
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.schema import Document
+from langchain.embeddings import OpenAIEmbeddings, InfinityEmbeddings, JinaEmbeddings, HuggingFaceEmbeddings
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document, BaseRetriever
 
 from config import Config
+from selection import topk
+from semantic_cache import SemanticCache
+
+try:
+    import faiss
+except ImportError:  # faiss is optional; VectorDBManager falls back to Chroma
+    faiss = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default embedding model for each supported backend
+DEFAULT_EMBEDDING_MODELS = {
+    "openai": "text-embedding-ada-002",
+    "infinity": "jinaai/jina-embeddings-v5-text-nano",
+    "jina": "jina-embeddings-v2-base-en",
+    "local": "BAAI/bge-small-en-v1.5",
+}
+
+# Texts per forward pass for in-process (sentence-transformers) embedding
+LOCAL_EMBEDDING_BATCH_SIZE = 64
+
+def _local_embedding_device() -> str:
+    """Run local embedding models on the GPU when one is available."""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def create_embeddings(backend: str = None) -> Embeddings:
+    """Create the embeddings client for the configured backend."""
+    if backend is None:
+        backend = Config.EMBEDDING_BACKEND
+    backend = backend.lower()
+    
+    if backend not in DEFAULT_EMBEDDING_MODELS:
+        logger.warning(f"Unsupported embedding backend: {backend}. Defaulting to OpenAI.")
+        backend = "openai"
+    
+    model = Config.EMBEDDING_MODEL or DEFAULT_EMBEDDING_MODELS[backend]
+    
+    if backend == "infinity":
+        embeddings = InfinityEmbeddings(model=model, infinity_api_url=Config.EMBEDDING_URL)
+    elif backend == "jina":
+        embeddings = JinaEmbeddings(jina_api_key=Config.JINA_API_KEY, model_name=model)
+    elif backend == "local":
+        embeddings = HuggingFaceEmbeddings(
+            model_name=model,
+            model_kwargs={"device": _local_embedding_device()},
+            encode_kwargs={"batch_size": LOCAL_EMBEDDING_BATCH_SIZE, "normalize_embeddings": True}
+        )
+    else:
+        embeddings = OpenAIEmbeddings(model=model, openai_api_key=Config.OPENAI_API_KEY)
+    
+    logger.info(f"Using {backend} embeddings ({model})")
+    return embeddings
+
 class VectorDBInterface(ABC):
     """Abstract interface for vector databases."""
     
     @abstractmethod
-    def add_documents(self, documents: List[Document]) -> None:
-        """Add documents to the vector database."""
+    def add_documents(self, documents: List[Document]) -> List[str]:
+        """Add documents to the vector database, returning their chunk ids."""
         pass
     
+    async def aadd_documents(self, documents: List[Document]) -> List[str]:
+        """Add documents to the vector database without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.add_documents, documents)
+    
     @abstractmethod
     def similarity_search(self, query: str, k: int = 4) -> List[Document]:
         """Perform similarity search."""
@@ -35,54 +103,592 @@ class VectorDBInterface(ABC):
         pass
     
     @abstractmethod
-    def delete_documents(self, source_file: str = None) -> None:
-        """Delete documents from the database."""
+    def similarity_search_by_vector_with_score(self, embedding: List[float],
+                                               k: int = 4) -> List[Tuple[Document, float]]:
+        """Perform similarity search with scores for a precomputed query embedding."""
+        pass
+    
+    @abstractmethod
+    def delete_documents(self, source_file: str = None) -> int:
+        """Delete documents from the database, returning the number of chunks removed."""
+        pass
+    
+    @abstractmethod
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete individual chunks by id, returning the number of chunks removed."""
         pass
 
 class ChromaVectorDB(VectorDBInterface):
     """Chroma vector database implementation."""
     
-    def __init__(self, embeddings: OpenAIEmbeddings):
+    # Embedding requests are network-bound, so several batches run at once
+    EMBEDDING_MAX_WORKERS = 8
+    
+    # Sidecar table of previously computed embeddings, keyed on chunk content
+    EMBEDDING_CACHE_FILE = "emb_cache.db"
+    
+    # Keeps IN (...) lookups under SQLite's bound-parameter limit
+    EMBEDDING_CACHE_LOOKUP_SIZE = 500
+    
+    COLLECTION_NAME = Chroma._LANGCHAIN_DEFAULT_COLLECTION_NAME
+    
+    # HNSW settings for each INDEX_PRESET, trading build time and recall for speed
+    INDEX_PRESETS = {
+        "fast": {"hnsw:M": 16, "hnsw:construction_ef": 100, "hnsw:search_ef": 32},
+        "balanced": {"hnsw:M": 16, "hnsw:construction_ef": 200, "hnsw:search_ef": 128},
+        "accurate": {"hnsw:M": 32, "hnsw:construction_ef": 256, "hnsw:search_ef": 256},
+    }
+    
+    # Records copied per request when a collection is rebuilt
+    REBUILD_BATCH_SIZE = 1000
+    
+    def __init__(self, embeddings: Embeddings):
         self.embeddings = embeddings
         self.persist_directory = Config.CHROMA_PERSIST_DIRECTORY
         
-        # Initialize Chroma
-        self.vectorstore = Chroma(
+        # Cached embeddings are only valid for the model that produced them
+        self._embedding_model = "{}:{}".format(
+            type(embeddings).__name__,
+            getattr(embeddings, "model", None) or getattr(embeddings, "model_name", "")
+        )
+        os.makedirs(self.persist_directory, exist_ok=True)
+        self._cache_lock = threading.Lock()
+        self._cache_conn = sqlite3.connect(
+            os.path.join(self.persist_directory, self.EMBEDDING_CACHE_FILE),
+            check_same_thread=False
+        )
+        self._cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb_cache (hash TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+        )
+        self._cache_conn.commit()
+        
+        self._vectorstore = None
+        self._vectorstore_lock = threading.Lock()
+    
+    @property
+    def vectorstore(self) -> Chroma:
+        """Open the Chroma collection on first use rather than at construction."""
+        if self._vectorstore is None:
+            with self._vectorstore_lock:
+                # Another thread may have opened it while this one waited
+                if self._vectorstore is None:
+                    self._vectorstore = self._open_vectorstore()
+        return self._vectorstore
+    
+    def _open_vectorstore(self) -> Chroma:
+        """Open the collection, rebuilding it first if its HNSW settings changed."""
+        preset = Config.INDEX_PRESET.lower()
+        if preset not in self.INDEX_PRESETS:
+            logger.warning(f"Unsupported index preset: {preset}. Defaulting to balanced.")
+            preset = "balanced"
+        # Vectors are normalized before they are stored or queried, so inner
+        # product ranks like cosine without the per-candidate norm computations
+        collection_metadata = {"hnsw:space": "ip", **self.INDEX_PRESETS[preset]}
+        
+        client = chromadb.PersistentClient(path=self.persist_directory)
+        self._apply_index_settings(client, collection_metadata)
+        vectorstore = Chroma(
+            client=client,
             persist_directory=self.persist_directory,
-            embedding_function=embeddings
+            embedding_function=self.embeddings,
+            collection_metadata=collection_metadata
         )
-        logger.info(f"Initialized Chroma database at {self.persist_directory}")
+        logger.info(f"Opened Chroma database at {self.persist_directory} ({preset} HNSW preset)")
+        return vectorstore
     
-    def add_documents(self, documents: List[Document]) -> None:
-        """Add documents to Chroma."""
-        if documents:
-            self.vectorstore.add_documents(documents)
-            self.vectorstore.persist()
-            logger.info(f"Added {len(documents)} documents to Chroma")
+    def _apply_index_settings(self, client, collection_metadata: dict) -> None:
+        """Rebuild an existing collection whose HNSW settings differ from collection_metadata.
+        
+        Chroma fixes the index parameters when a collection is created, so the
+        stored records are copied into a new collection with the new settings.
+        A rebuild interrupted by a crash is finished or redone on the next start.
+        """
+        rebuild_name = f"{self.COLLECTION_NAME}_rebuild"
+        try:
+            collection = client.get_collection(self.COLLECTION_NAME)
+        except ValueError:
+            collection = None
+        
+        try:
+            leftover = client.get_collection(rebuild_name)
+        except ValueError:
+            leftover = None
+        
+        if leftover is not None and collection is None:
+            # The original is only dropped after a complete copy, so just finish the rename
+            logger.warning(f"Completing an interrupted rebuild of the {self.COLLECTION_NAME} collection")
+            leftover.modify(name=self.COLLECTION_NAME)
+            collection = leftover
+        elif leftover is not None:
+            # The copy may be partial; the original is still intact
+            logger.warning(f"Discarding an interrupted rebuild of the {self.COLLECTION_NAME} collection")
+            client.delete_collection(rebuild_name)
+        
+        if collection is None:
+            return  # Created with the right settings on first use
+        
+        current = collection.metadata or {}
+        if all(current.get(key) == value for key, value in collection_metadata.items()):
+            return
+        
+        logger.info(f"HNSW settings changed - rebuilding the {self.COLLECTION_NAME} collection")
+        rebuilt = client.create_collection(rebuild_name, metadata={**current, **collection_metadata})
+        
+        for offset in range(0, collection.count(), self.REBUILD_BATCH_SIZE):
+            batch = collection.get(
+                limit=self.REBUILD_BATCH_SIZE,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            rebuilt.add(
+                ids=batch["ids"],
+                embeddings=self._unit_rows(batch["embeddings"]),
+                documents=batch["documents"],
+                metadatas=batch["metadatas"]
+            )
+        
+        # Only drop the original once every record has been copied
+        client.delete_collection(self.COLLECTION_NAME)
+        rebuilt.modify(name=self.COLLECTION_NAME)
+    
+    def add_documents(self, documents: List[Document]) -> List[str]:
+        """Embed documents in concurrent batches and add them to Chroma."""
+        if not documents:
+            return []
+        
+        texts = [doc.page_content for doc in documents]
+        keys, embeddings, missing = self._lookup_embeddings(texts)
+        batches = self._batches([texts[i] for i in missing])
+        
+        with ThreadPoolExecutor(max_workers=self.EMBEDDING_MAX_WORKERS) as executor:
+            results = list(executor.map(self.embeddings.embed_documents, batches))
+        self._store_embeddings(keys, embeddings, missing, [vector for batch in results for vector in batch])
+        
+        ids = self._add_embedded_documents(documents, embeddings)
+        logger.info(
+            f"Added {len(documents)} documents to Chroma "
+            f"({len(missing)} embedded in {len(batches)} batches, {len(texts) - len(missing)} cached)"
+        )
+        return ids
+    
+    async def aadd_documents(self, documents: List[Document]) -> List[str]:
+        """Embed documents in concurrent batches and add them to Chroma."""
+        if not documents:
+            return []
+        
+        texts = [doc.page_content for doc in documents]
+        keys, embeddings, missing = self._lookup_embeddings(texts)
+        batches = self._batches([texts[i] for i in missing])
+        
+        # Same bound as the thread pool in add_documents, so a large load doesn't
+        # open one embedding request per batch at once
+        semaphore = asyncio.Semaphore(self.EMBEDDING_MAX_WORKERS)
+        
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self.embeddings.aembed_documents(batch)
+        
+        results = await asyncio.gather(*(embed(batch) for batch in batches))
+        self._store_embeddings(keys, embeddings, missing, [vector for batch in results for vector in batch])
+        
+        ids = self._add_embedded_documents(documents, embeddings)
+        logger.info(
+            f"Added {len(documents)} documents to Chroma "
+            f"({len(missing)} embedded in {len(batches)} batches, {len(texts) - len(missing)} cached)"
+        )
+        return ids
+    
+    def _lookup_embeddings(self, texts: List[str]) -> Tuple[List[str], List[Optional[List[float]]], List[int]]:
+        """Fetch cached embeddings for texts.
+        
+        Returns the cache key of every text, the embeddings (None where not
+        cached) and the positions of the texts that still need embedding.
+        """
+        keys = [
+            hashlib.sha256(f"{self._embedding_model}\0{text}".encode("utf-8")).hexdigest()
+            for text in texts
+        ]
+        
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._cache_lock:
+            for start in range(0, len(unique_keys), self.EMBEDDING_CACHE_LOOKUP_SIZE):
+                batch = unique_keys[start:start + self.EMBEDDING_CACHE_LOOKUP_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                cursor = self._cache_conn.execute(
+                    f"SELECT hash, vec FROM emb_cache WHERE hash IN ({placeholders})", batch
+                )
+                for key, vec in cursor:
+                    found[key] = np.frombuffer(vec, dtype=np.float32).tolist()
+        
+        embeddings = [found.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(embeddings) if vector is None]
+        return keys, embeddings, missing
+    
+    def _store_embeddings(self, keys: List[str], embeddings: List[Optional[List[float]]],
+                          missing: List[int], vectors: List[List[float]]) -> None:
+        """Fill in freshly computed embeddings and add them to the cache."""
+        for i, vector in zip(missing, vectors):
+            embeddings[i] = vector
+        if not missing:
+            return
+        
+        with self._cache_lock:
+            self._cache_conn.executemany(
+                "INSERT OR REPLACE INTO emb_cache (hash, vec) VALUES (?, ?)",
+                [(keys[i], np.asarray(embeddings[i], dtype=np.float32).tobytes()) for i in missing]
+            )
+            self._cache_conn.commit()
+    
+    @staticmethod
+    def _batches(items: List) -> List[List]:
+        """Split items into embedding batches of the configured size."""
+        batch_size = Config.EMBEDDING_BATCH_SIZE
+        return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    
+    def _add_embedded_documents(self, documents: List[Document], embeddings: List[List[float]]) -> List[str]:
+        """Write documents with precomputed embeddings straight to the Chroma collection."""
+        ids = self._chunk_ids(documents)
+        
+        # Chroma caps the number of records per write, so upsert batch by batch
+        batch_size = Config.EMBEDDING_BATCH_SIZE
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            self.vectorstore._collection.upsert(
+                ids=ids[start:start + batch_size],
+                embeddings=self._unit_rows(embeddings[start:start + batch_size]),
+                documents=[doc.page_content for doc in batch],
+                metadatas=[doc.metadata for doc in batch]
+            )
+        self.vectorstore.persist()
+        return ids
+    
+    @staticmethod
+    def _unit_rows(vectors: List[List[float]]) -> List[List[float]]:
+        """L2-normalize embeddings for the inner-product index."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return (matrix / np.where(norms > 0, norms, 1.0)).tolist()
+    
+    @staticmethod
+    def _chunk_ids(documents: List[Document]) -> List[str]:
+        """Use the chunk ids assigned during loading, or random ones."""
+        return [doc.metadata.get("chunk_id") or uuid.uuid4().hex for doc in documents]
     
     def similarity_search(self, query: str, k: int = 4) -> List[Document]:
         """Perform similarity search in Chroma."""
-        return self.vectorstore.similarity_search(query, k=k)
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+    
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Perform similarity search with scores (cosine distance) in Chroma."""
+        return self.similarity_search_by_vector_with_score(self.embeddings.embed_query(query), k=k)
+    
+    def similarity_search_by_vector_with_score(self, embedding: List[float],
+                                               k: int = 4) -> List[Tuple[Document, float]]:
+        """Perform similarity search with scores in Chroma for a precomputed query embedding."""
+        # Despite its name, this returns Chroma's raw distances (1 - q.x for unit vectors)
+        return self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+            self._unit_rows([embedding])[0], k=k
+        )
+    
+    def get_embeddings(self, ids: List[str] = None) -> Tuple[List[str], np.ndarray]:
+        """Return stored chunk ids and embeddings (all of them when ids is None)."""
+        results = self.vectorstore._collection.get(ids=ids, include=["embeddings"])
+        return results["ids"], np.asarray(results["embeddings"], dtype=np.float32)
+    
+    def get_documents_with_embeddings(self, ids: List[str]) -> Tuple[List[Document], np.ndarray]:
+        """Fetch documents and their embeddings by chunk id."""
+        results = self.vectorstore._collection.get(
+            ids=ids,
+            include=["documents", "metadatas", "embeddings"]
+        )
+        documents = [
+            Document(page_content=content, metadata=metadata or {})
+            for content, metadata in zip(results["documents"], results["metadatas"])
+        ]
+        return documents, np.asarray(results["embeddings"], dtype=np.float32)
+    
+    def delete_documents(self, source_file: str = None) -> int:
+        """Delete all chunks of a source file from Chroma."""
+        if source_file is None:
+            logger.warning("No source file given - nothing deleted")
+            return 0
+        
+        # Chroma's delete doesn't report what it removed, so resolve the ids first
+        ids = self.vectorstore._collection.get(where={"source_file": source_file}, include=[])["ids"]
+        if ids:
+            self.vectorstore._collection.delete(ids=ids)
+            self.vectorstore.persist()
+        logger.info(f"Deleted {len(ids)} chunks of {source_file} from Chroma")
+        return len(ids)
+    
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete chunks from Chroma by id."""
+        if not chunk_ids:
+            return 0
+        
+        ids = self.vectorstore._collection.get(ids=chunk_ids, include=[])["ids"]
+        if ids:
+            self.vectorstore._collection.delete(ids=ids)
+            self.vectorstore.persist()
+        logger.info(f"Deleted {len(ids)} chunks from Chroma")
+        return len(ids)
+
+class FAISSVectorDB(VectorDBInterface):
+    """FAISS vector database implementation.
+    
+    Vectors live in a FAISS index (HNSW, HNSW over 8-bit scalar-quantized
+    vectors, or IVF-PQ for large corpora) and the chunk text and metadata in
+    a SQLite table keyed by FAISS id. Deleted chunks are removed from SQLite
+    only and skipped at search time.
+    """
+    
+    INDEX_FILE = "index.faiss"
+    DOCSTORE_FILE = "docstore.sqlite"
+    
+    # HNSW parameters
+    HNSW_M = 32
+    HNSW_EF_CONSTRUCTION = 200
+    HNSW_EF_SEARCH = 64
+    
+    # IVF-PQ parameters
+    IVF_NLIST = 1024
+    IVF_NPROBE = 16
+    PQ_M = 16
+    PQ_NBITS = 8
+    IVF_TRAIN_SIZE = 50000
+    
+    # The 8-bit quantizer learns per-dimension ranges from its training set and
+    # clips everything outside them, so it needs a representative sample
+    SQ_MIN_TRAIN = 1000
+    
+    def __init__(self, embeddings: Embeddings):
+        if faiss is None:
+            raise ImportError("faiss is not installed. Install faiss-cpu to use the FAISS backend.")
+        
+        self.embeddings = embeddings
+        self.persist_directory = Config.FAISS_INDEX_PATH
+        os.makedirs(self.persist_directory, exist_ok=True)
+        
+        self._lock = threading.RLock()
+        self._index_path = os.path.join(self.persist_directory, self.INDEX_FILE)
+        self.index = faiss.read_index(self._index_path) if os.path.exists(self._index_path) else None
+        self._configure_search()
+        
+        self._conn = sqlite3.connect(
+            os.path.join(self.persist_directory, self.DOCSTORE_FILE),
+            check_same_thread=False
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "faiss_id INTEGER PRIMARY KEY, chunk_id TEXT UNIQUE, content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        logger.info(f"Initialized FAISS database at {self.persist_directory}")
+    
+    def _create_index(self, vectors: np.ndarray):
+        """Create the configured FAISS index for vectors of this dimension."""
+        d = vectors.shape[1]
+        index_type = Config.FAISS_INDEX_TYPE.lower()
+        
+        if index_type == "ivfpq":
+            train = vectors[:self.IVF_TRAIN_SIZE]
+            # k-means wants ~39 training points per centroid
+            min_train = 39 * 2 ** self.PQ_NBITS
+            if d % self.PQ_M != 0:
+                logger.warning(f"Dimension {d} is not divisible by {self.PQ_M}; using HNSW instead of IVF-PQ")
+            elif len(train) < min_train:
+                logger.warning(f"IVF-PQ needs at least {min_train} vectors to train; using HNSW instead")
+            else:
+                nlist = min(self.IVF_NLIST, len(train) // 39)
+                quantizer = faiss.IndexFlatL2(d)
+                index = faiss.IndexIVFPQ(quantizer, d, nlist, self.PQ_M, self.PQ_NBITS)
+                index.train(train)
+                return index
+        elif index_type == "hnsw_sq":
+            train = vectors[:self.IVF_TRAIN_SIZE]
+            if len(train) < self.SQ_MIN_TRAIN:
+                logger.warning(
+                    f"HNSW-SQ needs at least {self.SQ_MIN_TRAIN} vectors to train; using HNSW instead"
+                )
+            else:
+                # Stores one byte per dimension
+                index = faiss.IndexHNSWSQ(d, faiss.ScalarQuantizer.QT_8bit, self.HNSW_M)
+                index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+                index.train(train)
+                return index
+        elif index_type != "hnsw":
+            logger.warning(f"Unsupported FAISS index type: {index_type}. Defaulting to HNSW.")
+        
+        index = faiss.IndexHNSWFlat(d, self.HNSW_M)
+        index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+        return index
+    
+    def _configure_search(self) -> None:
+        """Apply search-time parameters to the loaded index."""
+        if self.index is None:
+            return
+        if hasattr(self.index, "nprobe"):
+            self.index.nprobe = self.IVF_NPROBE
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = self.HNSW_EF_SEARCH
+    
+    @staticmethod
+    def _as_unit_matrix(vectors: List[List[float]]) -> np.ndarray:
+        """Stack embeddings into a float32 matrix of unit-length rows."""
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        faiss.normalize_L2(matrix)
+        return matrix
+    
+    def add_documents(self, documents: List[Document]) -> List[str]:
+        """Embed documents and add them to the FAISS index."""
+        if not documents:
+            return []
+        
+        vectors = self._as_unit_matrix(self.embeddings.embed_documents([doc.page_content for doc in documents]))
+        
+        with self._lock:
+            if self.index is None:
+                self.index = self._create_index(vectors)
+                self._configure_search()
+            
+            start = self.index.ntotal
+            self.index.add(vectors)
+            
+            chunk_ids = [doc.metadata.get("chunk_id") or uuid.uuid4().hex for doc in documents]
+            # Replacing a chunk leaves its old vector in the index as a tombstone
+            self._conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(i,) for i in chunk_ids])
+            self._conn.executemany(
+                "INSERT INTO chunks (faiss_id, chunk_id, content, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (start + i, chunk_id, doc.page_content, json.dumps(doc.metadata))
+                    for i, (chunk_id, doc) in enumerate(zip(chunk_ids, documents))
+                ]
+            )
+            self._conn.commit()
+            faiss.write_index(self.index, self._index_path)
+        
+        logger.info(f"Added {len(documents)} documents to FAISS")
+        return chunk_ids
+    
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """Perform similarity search in FAISS."""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
     
     def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
-        """Perform similarity search with scores in Chroma."""
-        return self.vectorstore.similarity_search_with_score(query, k=k)
+        """Perform similarity search with scores (squared L2 between unit vectors) in FAISS."""
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        
+        return self.similarity_search_by_vector_with_score(self.embeddings.embed_query(query), k=k)
     
-    def delete_documents(self, source_file: str = None) -> None:
-        """Delete documents from Chroma (limited functionality)."""
-        logger.warning("Chroma doesn't support easy document deletion. Consider recreating the database.")
+    def similarity_search_by_vector_with_score(self, embedding: List[float],
+                                               k: int = 4) -> List[Tuple[Document, float]]:
+        """Perform similarity search with scores in FAISS for a precomputed query embedding."""
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        
+        q = self._as_unit_matrix([embedding])
+        
+        with self._lock:
+            # Over-fetch until enough live (non-deleted) chunks are found
+            fetch = k
+            while True:
+                distances, ids = self.index.search(q, min(fetch, self.index.ntotal))
+                hits = [(int(i), float(dist)) for i, dist in zip(ids[0], distances[0]) if i >= 0]
+                rows = self._rows([i for i, _ in hits])
+                if len(rows) >= k or fetch >= self.index.ntotal:
+                    break
+                fetch *= 2
+        
+        results = []
+        for faiss_id, distance in hits:
+            if faiss_id in rows:
+                content, metadata = rows[faiss_id]
+                results.append((Document(page_content=content, metadata=json.loads(metadata)), distance))
+        return results[:k]
+    
+    def _rows(self, faiss_ids: List[int]) -> dict:
+        """Look up chunk text and metadata by FAISS id."""
+        if not faiss_ids:
+            return {}
+        placeholders = ",".join("?" * len(faiss_ids))
+        cursor = self._conn.execute(
+            f"SELECT faiss_id, content, metadata FROM chunks WHERE faiss_id IN ({placeholders})",
+            faiss_ids
+        )
+        return {faiss_id: (content, metadata) for faiss_id, content, metadata in cursor}
+    
+    def delete_documents(self, source_file: str = None) -> int:
+        """Delete all chunks of a source file from FAISS."""
+        if source_file is None:
+            logger.warning("No source file given - nothing deleted")
+            return 0
+        
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM chunks WHERE json_extract(metadata, '$.source_file') = ?",
+                (source_file,)
+            )
+            self._conn.commit()
+        logger.info(f"Deleted {cursor.rowcount} chunks of {source_file} from FAISS")
+        return cursor.rowcount
+    
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete chunks from FAISS by id."""
+        if not chunk_ids:
+            return 0
+        
+        with self._lock:
+            cursor = self._conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(i,) for i in chunk_ids])
+            self._conn.commit()
+        logger.info(f"Deleted {cursor.rowcount} chunks from FAISS")
+        return cursor.rowcount
+
+class VectorDBRetriever(BaseRetriever):
+    """LangChain retriever over a VectorDBInterface that has no LangChain vector store."""
+    
+    db: Any
+    k: int = 4
+    
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.db.similarity_search(query, k=self.k)
 
 class VectorDBManager:
     """Manager class for vector database operations."""
     
+    # The int8 index shortlists this many candidates per requested result
+    INT8_SHORTLIST_FACTOR = 4
+    
+    # Rows of the int8 index dequantized per matrix-vector product
+    INT8_BLOCK_ROWS = 8192
+    
+    INT8_CODES_FILE = "int8_index.npy"
+    INT8_META_FILE = "int8_index_meta.npz"
+    
+    # Paraphrased queries at least this similar reuse the cached results
+    QUERY_CACHE_THRESHOLD = 0.95
+    QUERY_CACHE_SIZE = 512
+    
+    # Cross-encoder used by search(rerank=True) to re-score a wider candidate set
+    RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_FETCH_FACTOR = 10
+    RERANK_BATCH_SIZE = 32
+    
     def __init__(self, db_type: str = None):
-        self.embeddings = OpenAIEmbeddings(openai_api_key=Config.OPENAI_API_KEY)
+        self.embeddings = create_embeddings()
         
         if db_type is None:
             db_type = Config.VECTOR_DB_TYPE
         
         if db_type.lower() == "chroma":
             self.db = ChromaVectorDB(self.embeddings)
+        elif db_type.lower() == "faiss" and faiss is not None:
+            self.db = FAISSVectorDB(self.embeddings)
+        elif db_type.lower() == "faiss":
+            logger.warning("faiss is not installed. Defaulting to Chroma.")
+            self.db = ChromaVectorDB(self.embeddings)
+            db_type = "chroma"
         else:
             # Default to Chroma if unsupported type is specified
             logger.warning(f"Unsupported vector database type: {db_type}. Defaulting to Chroma.")
@@ -91,32 +697,308 @@ class VectorDBManager:
         
         self.db_type = db_type
         logger.info(f"Initialized {db_type} vector database")
+        
+        # Settings read on every search, bound once to avoid repeated Config lookups
+        self._retrieval_k = Config.RETRIEVAL_K
+        self._int8_enabled = Config.INT8_INDEX_ENABLED and isinstance(self.db, ChromaVectorDB)
+        
+        # Optional int8 first-stage index as (codes, scale, offset, ids), with the
+        # codes memory-mapped from disk. Rebuilds swap in the whole tuple at once,
+        # so a search never mixes parts of two builds
+        self._int8 = None
+        self._int8_lock = threading.Lock()
+        if self._int8_enabled:
+            self._int8 = self._load_int8_index()
+            if self._int8 is None:
+                self._build_int8_index()
+        
+        # Results of recent searches, keyed on the query embedding
+        self._query_cache = SemanticCache(self.QUERY_CACHE_THRESHOLD, max_entries=self.QUERY_CACHE_SIZE)
+        self._rerank_cache = SemanticCache(self.QUERY_CACHE_THRESHOLD, max_entries=self.QUERY_CACHE_SIZE)
+        
+        # Loaded on the first reranked search
+        self._reranker = None
+        self._reranker_lock = threading.Lock()
+        
+        # Retrievers handed out by get_retriever, keyed on k
+        self._retrievers = {}
     
     def add_documents(self, documents: List[Document]) -> None:
         """Add documents to the vector database."""
-        return self.db.add_documents(documents)
+        ids = self.db.add_documents(documents)
+        self._on_documents_changed(added_ids=ids)
     
-    def search(self, query: str, k: int = None, with_scores: bool = False) -> List:
-        """Search for similar documents."""
+    async def aadd_documents(self, documents: List[Document]) -> None:
+        """Add documents to the vector database asynchronously."""
+        ids = await self.db.aadd_documents(documents)
+        self._on_documents_changed(added_ids=ids)
+    
+    def _on_documents_changed(self, added_ids: List[str] = None) -> None:
+        """Keep derived indexes in sync after the stored documents change.
+        
+        Pure additions are appended to the int8 index; anything else rebuilds it.
+        """
+        self._query_cache.clear()
+        self._rerank_cache.clear()
+        if not self._int8_enabled:
+            return
+        if added_ids is not None and self._append_int8_index(added_ids):
+            return
+        self._build_int8_index()
+    
+    def search(self, query: str, k: int = None, with_scores: bool = False, rerank: bool = False) -> List:
+        """Search for similar documents.
+        
+        The query is embedded once. Queries close enough to a recent one reuse
+        its results; otherwise the embedding is passed on to the index.
+        
+        With rerank, RERANK_FETCH_FACTOR * k candidates are re-scored by a
+        cross-encoder and the scores are its relevance scores (higher is
+        better) instead of distances.
+        """
         if k is None:
-            k = Config.RETRIEVAL_K
+            k = self._retrieval_k
         
-        if with_scores:
-            return self.db.similarity_search_with_score(query, k=k)
+        cache = self._rerank_cache if rerank else self._query_cache
+        embedding = self.embeddings.embed_query(query)
+        cached = cache.get(query, embedding)
+        if cached is not None and cached["k"] >= k:
+            results = cached["results"][:k]
         else:
-            return self.db.similarity_search(query, k=k)
+            if rerank:
+                candidates = self._search_by_vector(embedding, k * self.RERANK_FETCH_FACTOR)
+                results = self._rerank(query, [doc for doc, _ in candidates], k)
+            else:
+                results = self._search_by_vector(embedding, k)
+            
+            # A hit with too few results is overwritten rather than shadowed by a
+            # near-identical entry that get would never prefer over it
+            entry = {"k": k, "results": results}
+            if cached is None or not cache.replace(cached, entry):
+                cache.put(query, embedding, entry)
+        
+        return results if with_scores else [doc for doc, _ in results]
+    
+    def search_by_vector(self, embedding: List[float], k: int = None) -> List[Document]:
+        """Search with a query embedding the caller already has, e.g. from a cache lookup."""
+        if k is None:
+            k = self._retrieval_k
+        return [doc for doc, _ in self._search_by_vector(embedding, k)]
+    
+    def _get_reranker(self):
+        """Load the cross-encoder on first use."""
+        with self._reranker_lock:
+            if self._reranker is None:
+                try:
+                    from sentence_transformers import CrossEncoder
+                except ImportError:
+                    raise ImportError(
+                        "sentence-transformers is not installed. Install it to rerank search results."
+                    )
+                self._reranker = CrossEncoder(self.RERANK_MODEL)
+                logger.info(f"Loaded reranker {self.RERANK_MODEL}")
+            return self._reranker
+    
+    def _rerank(self, query: str, documents: List[Document], k: int) -> List[Tuple[Document, float]]:
+        """Order documents by cross-encoder relevance to the query and keep the top k."""
+        if not documents:
+            return []
+        
+        scores = np.asarray(self._get_reranker().predict(
+            [(query, doc.page_content) for doc in documents],
+            batch_size=self.RERANK_BATCH_SIZE
+        ), dtype=np.float32)
+        return [(documents[i], float(scores[i])) for i in topk(scores, k)]
+    
+    def _search_by_vector(self, embedding: List[float], k: int) -> List[Tuple[Document, float]]:
+        """Search the index with a precomputed query embedding."""
+        int8 = self._int8
+        if int8 is not None:
+            return self._search_int8(int8, self._unit_vector(embedding), k)
+        
+        return self.db.similarity_search_by_vector_with_score(embedding, k=k)
     
-    def delete_documents(self, source_file: str = None) -> None:
-        """Delete documents from the database."""
-        return self.db.delete_documents(source_file)
+    @staticmethod
+    def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize each row in place."""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+        return vectors
+    
+    @staticmethod
+    def _unit_vector(embedding: List[float]) -> np.ndarray:
+        """Convert a query embedding to a unit-length float32 vector."""
+        q = np.asarray(embedding, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        return q
+    
+    def _rank(self, documents: List[Document], vectors: np.ndarray, q: np.ndarray,
+              k: int) -> List[Tuple[Document, float]]:
+        """Order documents by exact cosine similarity to q and keep the top k."""
+        scores = self._normalize_rows(vectors) @ q
+        
+        # Report cosine distance, which is what Chroma's ip space gives for unit vectors
+        return [(documents[i], float(1.0 - scores[i])) for i in topk(scores, k)]
+    
+    def _build_int8_index(self) -> None:
+        """Quantize all stored embeddings to uint8 with a per-dimension scale and offset."""
+        codes_path = os.path.join(Config.CHROMA_PERSIST_DIRECTORY, self.INT8_CODES_FILE)
+        meta_path = os.path.join(Config.CHROMA_PERSIST_DIRECTORY, self.INT8_META_FILE)
+        
+        with self._int8_lock:
+            ids, vectors = self.db.get_embeddings()
+            if not ids:
+                self._int8 = None
+                for path in (codes_path, meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                return
+            
+            vectors = self._normalize_rows(vectors)
+            offset = vectors.min(axis=0)
+            scale = (vectors.max(axis=0) - offset) / 255.0
+            scale[scale == 0] = 1.0
+            
+            blocks = (
+                np.clip(np.rint((vectors[start:start + self.INT8_BLOCK_ROWS] - offset) / scale), 0, 255)
+                for start in range(0, len(vectors), self.INT8_BLOCK_ROWS)
+            )
+            self._write_int8_index(blocks, vectors.shape, scale, offset, ids)
+        logger.info(f"Built int8 index for {len(ids)} chunks")
+    
+    def _append_int8_index(self, new_ids: List[str]) -> bool:
+        """Quantize only the given new chunks with the current scale and offset.
+        
+        Returns False, leaving the index untouched, when a full rebuild is needed
+        instead: there is no index yet, a chunk id is already indexed, or a new
+        vector falls outside the range the scale and offset were fitted to.
+        """
+        if not new_ids:
+            return True
+        
+        new_ids, vectors = self.db.get_embeddings(new_ids)
+        with self._int8_lock:
+            if self._int8 is None:
+                return False
+            codes, scale, offset, ids = self._int8
+            if vectors.shape[1] != codes.shape[1] or not set(ids).isdisjoint(new_ids):
+                return False
+            
+            new_codes = np.rint((self._normalize_rows(vectors) - offset) / scale)
+            if new_codes.min() < 0 or new_codes.max() > 255:
+                return False
+            
+            # The existing codes are copied block by block; no FP32 embeddings are read back
+            blocks = [codes[start:start + self.INT8_BLOCK_ROWS] for start in range(0, len(codes), self.INT8_BLOCK_ROWS)]
+            blocks.append(new_codes)
+            self._write_int8_index(blocks, (len(codes) + len(new_codes), codes.shape[1]), scale, offset, ids + new_ids)
+        logger.info(f"Appended {len(new_ids)} chunks to the int8 index")
+        return True
+    
+    def _write_int8_index(self, blocks: Iterable[np.ndarray], shape: Tuple[int, int], scale: np.ndarray,
+                          offset: np.ndarray, ids: List[str]) -> None:
+        """Write codes (given as consecutive row blocks) and metadata, then swap them in (lock held)."""
+        codes_path = os.path.join(Config.CHROMA_PERSIST_DIRECTORY, self.INT8_CODES_FILE)
+        meta_path = os.path.join(Config.CHROMA_PERSIST_DIRECTORY, self.INT8_META_FILE)
+        
+        # Searches may still be reading the current files through their memory
+        # map, so write new ones alongside and rename them into place
+        codes_tmp = f"{codes_path}.tmp"
+        codes = np.lib.format.open_memmap(codes_tmp, mode="w+", dtype=np.uint8, shape=shape)
+        start = 0
+        for block in blocks:
+            codes[start:start + len(block)] = block
+            start += len(block)
+        codes.flush()
+        del codes
+        
+        meta_tmp = f"{meta_path}.tmp"
+        with open(meta_tmp, "wb") as f:
+            np.savez(f, scale=scale, offset=offset, ids=np.asarray(ids))
+        
+        os.replace(codes_tmp, codes_path)
+        os.replace(meta_tmp, meta_path)
+        self._int8 = self._load_int8_index()
+    
+    def _load_int8_index(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]]:
+        """Memory-map a previously built int8 index, if present."""
+        codes_path = os.path.join(Config.CHROMA_PERSIST_DIRECTORY, self.INT8_CODES_FILE)
+        meta_path = os.path.join(Config.CHROMA_PERSIST_DIRECTORY, self.INT8_META_FILE)
+        if not (os.path.exists(codes_path) and os.path.exists(meta_path)):
+            return None
+        
+        try:
+            with np.load(meta_path) as meta:
+                scale = meta["scale"].astype(np.float32)
+                offset = meta["offset"].astype(np.float32)
+                ids = meta["ids"].tolist()
+            codes = np.load(codes_path, mmap_mode="r")
+        except Exception as e:
+            logger.warning(f"Could not load int8 index: {e}")
+            return None
+        
+        # A crash between the two renames leaves files from different builds
+        if codes.shape != (len(ids), len(scale)):
+            logger.warning("int8 index files are out of sync - rebuilding")
+            return None
+        return codes, scale, offset, ids
+    
+    def _search_int8(self, int8: Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]], q: np.ndarray,
+                     k: int) -> List[Tuple[Document, float]]:
+        """Shortlist candidates on the int8 index, then re-rank them with the FP32 embeddings."""
+        codes, scale, offset, ids = int8
+        if q.shape[0] != codes.shape[1]:
+            logger.warning("int8 index dimension does not match the embeddings - rebuilding")
+            self._build_int8_index()
+            if self._int8 is None or self._int8[0].shape[1] != q.shape[0]:
+                return self.db.similarity_search_by_vector_with_score(q.tolist(), k=k)
+            codes, scale, offset, ids = self._int8
+        
+        # x ~= offset + scale * code, so x . q ~= code . (scale * q) + offset . q
+        weights = scale * q
+        bias = float(offset @ q)
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, len(scores), self.INT8_BLOCK_ROWS):
+            block = codes[start:start + self.INT8_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ weights + bias
+        
+        shortlist = [ids[i] for i in topk(scores, self.INT8_SHORTLIST_FACTOR * k)]
+        documents, vectors = self.db.get_documents_with_embeddings(shortlist)
+        if not documents:
+            return []
+        
+        return self._rank(documents, vectors, q, k)
+    
+    def delete_documents(self, source_file: str = None) -> int:
+        """Delete documents from the database, returning the number of chunks removed."""
+        removed = self.db.delete_documents(source_file)
+        if removed:
+            self._on_documents_changed()
+        return removed
+    
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete individual chunks by id, returning the number of chunks removed."""
+        removed = self.db.delete_chunks(chunk_ids)
+        if removed:
+            self._on_documents_changed()
+        return removed
     
     def get_retriever(self, k: int = None):
-        """Get a retriever object for use with LangChain."""
+        """Get a retriever object for use with LangChain (one shared instance per k)."""
         if k is None:
-            k = Config.RETRIEVAL_K
-            
+            k = self._retrieval_k
+        
+        retriever = self._retrievers.get(k)
+        if retriever is not None:
+            return retriever
+        
         if hasattr(self.db, 'vectorstore') and self.db.vectorstore:
-            return self.db.vectorstore.as_retriever(search_kwargs={"k": k})
+            retriever = self.db.vectorstore.as_retriever(search_kwargs={"k": k})
+        elif isinstance(self.db, FAISSVectorDB):
+            retriever = VectorDBRetriever(db=self.db, k=k)
         else:
             logger.warning("No documents in vector database")
-            return None
\ No newline at end of file
+            return None
+        
+        self._retrievers[k] = retriever
+        return retriever
\ No newline at end of file